@@ -0,0 +1,410 @@
+"""
+Module: _hooklib.py
+Purpose: Shared helpers for the workflow hooks
+
+Hooks run as separate short-lived processes, so anything imported here is
+paid for on every hook invocation. Keep this module small and free of
+heavy imports: paths are plain os.path strings (pathlib alone costs
+several ms to import) and datetime is avoided entirely.
+"""
+
+import json
+import os
+import sys
+import time
+import zlib
+from functools import lru_cache
+
+
+# Hooks run from the project root; resolve shared paths once per process
+PROJECT_ROOT = os.getcwd()
+STATE_PATH = os.path.join(PROJECT_ROOT, 'docs', 'workflow', 'state.json')
+ARTIFACTS_DIR = os.path.join(PROJECT_ROOT, 'docs', 'workflow', 'artifacts')
+
+# Write-ahead log of state changes, replayed on top of state.json at load.
+# Each record names the state.json it extends, so records are dropped once
+# state.json is rewritten by anything else. Once the log grows past
+# WAL_COMPACT_SIZE (bytes) the next commit rewrites state.json in full and
+# removes it
+WAL_PATH = os.path.join(PROJECT_ROOT, 'docs', 'workflow', 'state.wal')
+WAL_COMPACT_SIZE = 256 * 1024
+
+# Completed-node history, one JSON line per node. state.json only records
+# which workflow run the entries belong to and how many there are
+COMPLETED_NODES_PATH = os.path.join(PROJECT_ROOT, 'docs', 'workflow', 'completed_nodes.jsonl')
+
+# Snapshot of the artifacts directory listing, shared between hook processes
+ARTIFACTS_LISTING_PATH = os.path.join(PROJECT_ROOT, 'docs', 'workflow', '.artifacts.lst')
+
+# orjson is optional, and importing it (~15 ms: it pulls in datetime, uuid
+# and zoneinfo) only pays off for payloads at least this large (bytes)
+ORJSON_MIN_SIZE = 128 * 1024
+
+# Imported lazily by _get_orjson(): None = not tried, False = unavailable
+_orjson = None
+
+# state.json is written compact; set SHARK_STATE_PRETTY=1 to indent it for
+# reading by hand
+STATE_PRETTY = bool(os.environ.get('SHARK_STATE_PRETTY'))
+
+
+# Artifact naming patterns:
+#   D01-*.md  discovery
+#   F01-*.md  feature
+#   T01-*.md  technical
+#   DEV-*     development
+#   R01-*.md  release
+NUMBERED_ARTIFACT_TYPES = {
+    'D': 'discovery',
+    'F': 'feature',
+    'T': 'technical',
+    'R': 'release'
+}
+
+
+def is_artifact(filename):
+    """Check if filename matches any artifact pattern."""
+    if filename.startswith('DEV-'):
+        return True, 'development'
+
+    # <prefix><two digits>-<anything>.md
+    artifact_type = NUMBERED_ARTIFACT_TYPES.get(filename[:1])
+    if (artifact_type
+            and filename.endswith('.md')
+            and filename[1:3].isdecimal()
+            and filename[3:4] == '-'):
+        return True, artifact_type
+
+    return False, None
+
+
+def _get_orjson():
+    """Import orjson on first use; return False if it is not installed."""
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = False
+    return _orjson
+
+
+def json_loads(data):
+    """Parse JSON from bytes or str, using orjson for large payloads."""
+    if len(data) >= ORJSON_MIN_SIZE and _get_orjson():
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps_line(obj):
+    """Serialize to compact single-line UTF-8 JSON bytes."""
+    if _orjson:
+        return _orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def json_dumps(obj):
+    """Serialize state to JSON bytes, compact unless STATE_PRETTY; orjson if loaded."""
+    if not STATE_PRETTY:
+        return json_dumps_line(obj)
+    if _orjson:
+        return _orjson.dumps(obj, option=_orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+
+
+def _stderr_log(msg):
+    """Default log for the helpers below: write msg to stderr straight away."""
+    print(msg, file=sys.stderr)
+
+
+def read_event():
+    """Read the hook event from stdin in one bytes read; empty input yields {}."""
+    raw = sys.stdin.buffer.read()
+    return json_loads(raw) if raw else {}
+
+
+def now_iso():
+    """Return the current UTC time in ISO 8601, without importing datetime."""
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    stamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+    return f'{stamp}.{nanos // 1000:06d}+00:00'
+
+
+def mtime_settled(mtime_ns):
+    """Return True if mtime_ns is old enough to key a cache on."""
+    # On coarse-timestamp filesystems, anything modified within the last
+    # second can change again without its mtime moving
+    return time.time_ns() - mtime_ns > 1_000_000_000
+
+
+@lru_cache(maxsize=None)
+def list_artifacts():
+    """Return the artifacts directory listing, shared between hooks via a snapshot file."""
+    try:
+        dir_mtime = os.stat(ARTIFACTS_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return frozenset()
+
+    try:
+        with open(ARTIFACTS_LISTING_PATH) as f:
+            cached_mtime, _, listing = f.read().partition('\n')
+        if cached_mtime == str(dir_mtime):
+            return frozenset(listing.split('\n')) if listing else frozenset()
+    except OSError:
+        pass
+
+    try:
+        with os.scandir(ARTIFACTS_DIR) as entries:
+            names = [entry.name for entry in entries]
+    except FileNotFoundError:
+        return frozenset()
+
+    if mtime_settled(dir_mtime):
+        try:
+            snapshot = f"{dir_mtime}\n" + '\n'.join(names)
+            write_atomic(ARTIFACTS_LISTING_PATH, snapshot.encode(), fsync=False)
+        except OSError:
+            pass
+
+    return frozenset(names)
+
+
+def load_state(log=_stderr_log):
+    """Load state.json with the WAL replayed on top; None if there is no state."""
+    try:
+        with open(STATE_PATH, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+
+    try:
+        state = json_loads(raw)
+    except ValueError as e:
+        log(f"ERROR: Failed to parse state.json: {e}")
+        return None
+
+    # A state.json holding null (or anything but an object) has no workflow
+    if not isinstance(state, dict):
+        return None
+
+    # Remember the on-disk bytes so save_state can skip no-op writes
+    state['_raw'] = raw
+    state['_base'] = _state_base(raw)
+    _replay_wal(state)
+    return state
+
+
+def save_state(state, log=_stderr_log):
+    """Atomically rewrite state.json if changed, folding in and removing the WAL."""
+    try:
+        # Drop in-memory keys (indexes, raw bytes) before writing
+        public_state = {k: v for k, v in state.items() if not k.startswith('_')}
+        data = json_dumps(public_state)
+        if data == state.get('_raw'):
+            return True
+
+        write_atomic(STATE_PATH, data)
+        state['_raw'] = data
+        state['_base'] = _state_base(data)
+    except Exception as e:
+        log(f"ERROR: Failed to save state.json: {e}")
+        return False
+
+    # WAL records name the state.json they extend, so a WAL left behind by
+    # a crash here is skipped on replay rather than applied twice
+    try:
+        os.remove(WAL_PATH)
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def _append_lines(path, lines):
+    """Durably append lines (bytes) to a JSON-lines log, ending a torn last line first."""
+    with open(path, 'a+b') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end:
+            f.seek(end - 1)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+        f.write(b'\n'.join(lines) + b'\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_lines(path):
+    """Yield the parsed lines of a JSON-lines log, skipping torn ones."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return
+
+    # Lines are small, so decide on orjson by the size of the whole log
+    loads = _orjson.loads if len(data) >= ORJSON_MIN_SIZE and _get_orjson() else json.loads
+    for line in data.splitlines():
+        try:
+            yield loads(line)
+        except ValueError:
+            continue
+
+
+def _state_base(raw):
+    """Identify a state.json by its length and CRC32, to bind WAL records to it."""
+    return f"{len(raw)}:{zlib.crc32(raw):08x}"
+
+
+def _apply_wal_record(state, record):
+    """Apply one WAL record (a single append_wal() call) to state."""
+    for op, key, value in record['changes']:
+        if op == 'append':
+            state.setdefault(key, []).append(value)
+        elif op == 'set':
+            state[key] = value
+
+
+def _replay_wal(state):
+    """Apply the WAL records bound to the loaded state.json, skipping stale ones."""
+    base = state['_base']
+    for record in _read_lines(WAL_PATH):
+        if record.get('base') == base:
+            _apply_wal_record(state, record)
+
+
+def append_wal(state, changes, log=_stderr_log):
+    """
+    Persist (op, key, value) changes already made to state as one WAL line.
+
+    'append' adds to the list at state[key], 'set' replaces it. Past
+    WAL_COMPACT_SIZE the whole state is saved instead.
+    """
+    # State not read by load_state() has no state.json to extend
+    base = state.get('_base')
+    try:
+        if base is None or os.path.getsize(WAL_PATH) >= WAL_COMPACT_SIZE:
+            return save_state(state, log)
+    except FileNotFoundError:
+        pass
+
+    try:
+        _append_lines(WAL_PATH, [json_dumps_line({'base': base, 'changes': changes})])
+        return True
+    except Exception as e:
+        log(f"ERROR: Failed to append to state.wal: {e}")
+        return False
+
+
+def _workflow_run(state):
+    """Identify the current workflow run; a restarted workflow gets a new one."""
+    return state.get('workflow_context', {}).get('started_at')
+
+
+def completed_nodes_count(state):
+    """Return how many nodes the current workflow has completed."""
+    count = len(state.get('completed_nodes', []))
+    log = state.get('completed_nodes_log')
+    if log and log.get('run') == _workflow_run(state):
+        count += log['count']
+    return count
+
+
+def load_completed_nodes(state, log=_stderr_log):
+    """Return this run's completed-node history, oldest first; cached on state."""
+    nodes = state.get('_completed_nodes')
+    if nodes is not None:
+        return nodes
+
+    nodes = list(state.get('completed_nodes', []))
+    count = completed_nodes_count(state)
+    if count > len(nodes):
+        # Only this run's lines count, and the last line for a position wins
+        run = _workflow_run(state)
+        by_position = {}
+        for entry in _read_lines(COMPLETED_NODES_PATH):
+            if entry.get('run') == run:
+                by_position[entry['n']] = entry['node']
+        nodes.extend(by_position[n] for n in range(len(nodes) + 1, count + 1) if n in by_position)
+
+        if len(nodes) < count:
+            log(f"WARNING: completed_nodes.jsonl has {len(nodes)} of the {count} "
+                f"completed nodes recorded for this workflow run")
+
+    state['_completed_nodes'] = nodes
+    return nodes
+
+
+def append_completed_node(state, record, log=_stderr_log):
+    """Append record to this run's history; the caller persists completed_nodes_log."""
+    run = _workflow_run(state)
+    n = completed_nodes_count(state) + 1
+    try:
+        _append_lines(COMPLETED_NODES_PATH, [json_dumps_line({'run': run, 'n': n, 'node': record})])
+    except OSError as e:
+        log(f"ERROR: Failed to append to completed_nodes.jsonl: {e}")
+        return False
+
+    state['completed_nodes_log'] = {'run': run, 'count': n - len(state.get('completed_nodes', []))}
+    if state.get('_completed_nodes') is not None:
+        state['_completed_nodes'].append(record)
+    return True
+
+
+def pending_for_node(state, node):
+    """Return the pending artifacts expected from node, via an index built on first use."""
+    by_node = state.get('_by_node')
+    if by_node is None:
+        by_node = {}
+        for artifact in state.get('pending_artifacts', []):
+            by_node.setdefault(artifact.get('expected_from'), []).append(artifact)
+        state['_by_node'] = by_node
+
+    return by_node.get(node, [])
+
+
+def pending_by_name(state, artifact_name):
+    """Return the pending artifact named artifact_name, or None; indexed on first use."""
+    by_name = state.get('_by_name')
+    if by_name is None:
+        by_name = {}
+        for artifact in state.get('pending_artifacts', []):
+            by_name.setdefault(artifact['artifact_name'], artifact)
+        state['_by_name'] = by_name
+
+    return by_name.get(artifact_name)
+
+
+def write_atomic(path, data, fsync=True):
+    """Write bytes to path via a per-process temp file and rename; fsync=False for caches."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def main(argv):
+    """Print the state merged with the WAL; --compact first folds the WAL into state.json."""
+    state = load_state()
+    if state is None:
+        print("No workflow state found", file=sys.stderr)
+        return 1
+    if '--compact' in argv and not save_state(state):
+        return 1
+
+    public_state = {k: v for k, v in state.items() if not k.startswith('_')}
+    print(json.dumps(public_state, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
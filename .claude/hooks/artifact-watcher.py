@@ -12,72 +12,24 @@ This hook fires after the Write tool creates a file. It:
 """
 
 import json
+import os
 import sys
-import re
-from pathlib import Path
-from datetime import datetime
 
+from _hooklib import (
+    is_artifact, json_loads, load_state, now_iso, pending_by_name,
+    pending_for_node, save_state,
+)
 
-# Artifact naming patterns
-ARTIFACT_PATTERNS = {
-    'discovery': r'^D\d{2}-.*\.md$',
-    'feature': r'^F\d{2}-.*\.md$',
-    'technical': r'^T\d{2}-.*\.md$',
-    'development': r'^DEV-.*',
-    'release': r'^R\d{2}-.*\.md$'
-}
 
-
-def is_artifact(filename):
-    """Check if filename matches any artifact pattern."""
-    for pattern_name, pattern in ARTIFACT_PATTERNS.items():
-        if re.match(pattern, filename):
-            return True, pattern_name
-    return False, None
-
-
-def load_state():
-    """Load workflow state from state.json."""
-    project_root = Path.cwd()
-    state_path = project_root / 'docs' / 'workflow' / 'state.json'
-
-    if not state_path.exists():
-        return None
-
-    try:
-        with open(state_path) as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"ERROR: Failed to parse state.json: {e}", file=sys.stderr)
-        return None
-
-
-def save_state(state):
-    """Save updated workflow state to state.json."""
-    project_root = Path.cwd()
-    state_path = project_root / 'docs' / 'workflow' / 'state.json'
-
-    try:
-        with open(state_path, 'w') as f:
-            json.dump(state, f, indent=2)
-        return True
-    except Exception as e:
-        print(f"ERROR: Failed to save state.json: {e}", file=sys.stderr)
-        return False
-
-
-def update_artifact_status(state, artifact_name):
+def update_artifact_status(state, artifact_name, now):
     """Mark artifact as created in pending_artifacts list."""
-    updated = False
-
-    for artifact in state.get('pending_artifacts', []):
-        if artifact['artifact_name'] == artifact_name:
-            artifact['status'] = 'created'
-            artifact['created_at'] = datetime.now().isoformat()
-            updated = True
-            break
+    artifact = pending_by_name(state, artifact_name)
+    if not artifact:
+        return False
 
-    return updated
+    artifact['status'] = 'created'
+    artifact['created_at'] = now
+    return True
 
 
 def check_node_completion(state):
@@ -90,10 +42,7 @@ def check_node_completion(state):
         return False
 
     # Get all pending artifacts for current node
-    node_artifacts = [
-        a for a in state.get('pending_artifacts', [])
-        if a.get('expected_from') == current_node
-    ]
+    node_artifacts = pending_for_node(state, current_node)
 
     if not node_artifacts:
         return False
@@ -106,9 +55,19 @@ def check_node_completion(state):
 
 def main():
     """Main hook execution."""
+    # One timestamp for every field this run touches
+    now = now_iso()
+
     try:
         # Read event data from stdin
-        event_data = json.load(sys.stdin)
+        raw = sys.stdin.buffer.read()
+
+        # Cheap prefilter: payloads without a "Write" string can't be Write
+        # events, so skip parsing potentially large tool results
+        if b'"Write"' not in raw:
+            return
+
+        event_data = json_loads(raw)
 
         tool_name = event_data.get('tool_name')
         tool_result = event_data.get('result', {})
@@ -122,8 +81,7 @@ def main():
         if not file_path:
             return
 
-        file_path = Path(file_path)
-        filename = file_path.name
+        filename = os.path.basename(file_path)
 
         # Check if this is an artifact
         is_art, artifact_type = is_artifact(filename)
@@ -146,7 +104,7 @@ def main():
             return
 
         # Update artifact status
-        was_pending = update_artifact_status(state, filename)
+        was_pending = update_artifact_status(state, filename, now)
 
         if was_pending:
             print(f"[artifact-watcher] Marked {filename} as created in pending artifacts", file=sys.stderr)
@@ -154,7 +112,7 @@ def main():
             print(f"[artifact-watcher] Artifact {filename} was not in pending list (unexpected artifact)", file=sys.stderr)
 
         # Update workflow metadata
-        state['workflow_context']['updated_at'] = datetime.now().isoformat()
+        state['workflow_context']['updated_at'] = now
         state['metadata']['last_modified_by'] = 'artifact-watcher-hook'
 
         # Check if current node is now complete
@@ -12,46 +12,34 @@ This hook fires when an agent session starts. It:
 """
 
 import json
+import os
 import sys
-from pathlib import Path
-from datetime import datetime
 
+from _hooklib import (
+    ARTIFACTS_DIR, completed_nodes_count, list_artifacts, load_completed_nodes,
+    load_state, pending_for_node, read_event,
+)
 
-def load_state():
-    """Load workflow state from state.json."""
-    project_root = Path.cwd()
-    state_path = project_root / 'docs' / 'workflow' / 'state.json'
-
-    if not state_path.exists():
-        return None
-
-    try:
-        with open(state_path) as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"ERROR: Failed to parse state.json: {e}", file=sys.stderr)
-        return None
+# Static message decorations, built once at import
+_CONTEXT_BANNER = """
+╔═══════════════════════════════════════════════════════════════╗
+║                    WORKFLOW CONTEXT LOADED                    ║
+╚═══════════════════════════════════════════════════════════════╝
+"""
+_CONTEXT_FOOTER = "\n" + "═" * 65 + "\n"
 
 
 def get_artifact_paths(artifact_names):
     """Get full paths to artifact files."""
-    project_root = Path.cwd()
-    artifacts_dir = project_root / 'docs' / 'workflow' / 'artifacts'
-
-    paths = []
-    for name in artifact_names:
-        artifact_path = artifacts_dir / name
-        if artifact_path.exists():
-            paths.append(str(artifact_path))
-
-    return paths
+    existing = list_artifacts()
+    return [os.path.join(ARTIFACTS_DIR, name) for name in artifact_names if name in existing]
 
 
 def get_current_node_inputs(state):
     """Identify input artifacts for current node."""
     # This would typically come from the CSV definition
     # For now, we'll look for recently created artifacts
-    completed_nodes = state.get('completed_nodes', [])
+    completed_nodes = load_completed_nodes(state)
 
     if not completed_nodes:
         return []
@@ -86,26 +74,18 @@ def generate_context_message(state):
     started_at = workflow_context.get('started_at', 'unknown')
 
     # Get pending artifacts
-    pending_artifacts = state.get('pending_artifacts', [])
-    current_node_artifacts = [
-        a for a in pending_artifacts
-        if a.get('expected_from') == current_node
-    ]
+    current_node_artifacts = pending_for_node(state, current_node)
 
     # Get available inputs
     input_artifact_names = get_current_node_inputs(state)
     input_artifact_paths = get_artifact_paths(input_artifact_names)
 
     # Get workflow history
-    completed_nodes = state.get('completed_nodes', [])
-    num_completed = len(completed_nodes)
+    completed_nodes = load_completed_nodes(state)
+    num_completed = completed_nodes_count(state)
 
     # Build context message
-    message = f"""
-╔═══════════════════════════════════════════════════════════════╗
-║                    WORKFLOW CONTEXT LOADED                    ║
-╚═══════════════════════════════════════════════════════════════╝
-
+    parts = [_CONTEXT_BANNER, f"""
 Current Workflow: {graph_name}
 Current Node: {current_node}
 Assigned Agent: {current_agent}
@@ -114,41 +94,41 @@ Workflow Status: {workflow_status}
 Triggered By: {triggered_by}
 Started: {started_at}
 Nodes Completed: {num_completed}
-"""
+"""]
 
     if current_node_artifacts:
-        message += f"\nExpected Outputs from This Node:\n"
+        parts.append("\nExpected Outputs from This Node:\n")
         for artifact in current_node_artifacts:
             status = artifact.get('status', 'pending')
             artifact_name = artifact.get('artifact_name')
-            message += f"  • {artifact_name} [{status}]\n"
+            parts.append(f"  • {artifact_name} [{status}]\n")
 
     if input_artifact_paths:
-        message += f"\nAvailable Input Artifacts:\n"
+        parts.append("\nAvailable Input Artifacts:\n")
         for path in input_artifact_paths:
-            message += f"  • {path}\n"
+            parts.append(f"  • {path}\n")
 
     if completed_nodes:
-        message += f"\nRecent Workflow History:\n"
+        parts.append("\nRecent Workflow History:\n")
         for node in completed_nodes[-3:]:  # Show last 3 nodes
             node_name = node.get('node_name')
             agent = node.get('agent')
             artifacts = node.get('artifacts_produced', [])
-            message += f"  • {node_name} ({agent})"
+            parts.append(f"  • {node_name} ({agent})")
             if artifacts:
-                message += f" → {', '.join(artifacts)}"
-            message += "\n"
+                parts.append(f" → {', '.join(artifacts)}")
+            parts.append("\n")
 
     # Check if in subgraph
     subgraph_stack = state.get('subgraph_stack', [])
     if subgraph_stack:
         current_subgraph = subgraph_stack[-1]
         parent_graph = current_subgraph.get('parent_graph')
-        message += f"\n⚠ Note: Currently in subgraph, will return to {parent_graph} when complete\n"
+        parts.append(f"\n⚠ Note: Currently in subgraph, will return to {parent_graph} when complete\n")
 
-    message += "\n" + "═" * 65 + "\n"
+    parts.append(_CONTEXT_FOOTER)
 
-    return message
+    return ''.join(parts)
 
 
 def generate_workflow_guidance(state):
@@ -177,8 +157,7 @@ def generate_workflow_guidance(state):
 """
 
     elif workflow_status == 'active':
-        pending = state.get('pending_artifacts', [])
-        node_pending = [a for a in pending if a.get('expected_from') == current_node]
+        node_pending = pending_for_node(state, current_node)
 
         if node_pending:
             guidance = f"""
@@ -194,7 +173,7 @@ def main():
     """Main hook execution."""
     try:
         # Read event data from stdin
-        event_data = json.load(sys.stdin)
+        event_data = read_event()
 
         print(f"[context-loader] Session starting, loading workflow context", file=sys.stderr)
 
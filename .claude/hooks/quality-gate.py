@@ -13,24 +13,48 @@ This hook fires BEFORE certain tools execute. It:
 """
 
 import json
-import sys
+import os
 import re
-from pathlib import Path
-from datetime import datetime
+import sys
+from functools import lru_cache
 
+from _hooklib import (
+    ARTIFACTS_DIR, COMPLETED_NODES_PATH, STATE_PATH,
+    completed_nodes_count, is_artifact, list_artifacts, load_completed_nodes,
+    load_state, mtime_settled, pending_for_node, read_event,
+)
 
-# Artifact naming patterns
-ARTIFACT_PATTERNS = {
-    'discovery': r'^D\d{2}-.*\.md$',
-    'feature': r'^F\d{2}-.*\.md$',
-    'technical': r'^T\d{2}-.*\.md$',
-    'development': r'^DEV-.*',
-    'release': r'^R\d{2}-.*\.md$'
-}
+# Sidecar recording the last passing prerequisite check. The quality gate
+# runs before the tool, so it never writes state.json itself
+PREREQ_CACHE_PATH = os.path.join(os.path.dirname(STATE_PATH), '.prereq_ok')
 
 # Minimum file size for artifacts (bytes) - prevents empty file creation
 MIN_ARTIFACT_SIZE = 100
 
+# Artifacts larger than this (bytes) only have the first and last
+# PLACEHOLDER_SCAN_WINDOW bytes scanned for placeholder text
+MAX_PLACEHOLDER_SCAN_SIZE = 10_000_000
+PLACEHOLDER_SCAN_WINDOW = 4096
+
+# Bytes treated as whitespace when stripping artifact content
+_WHITESPACE = b' \t\n\r\x0b\x0c'
+
+# Static BLOCKED message decorations, built once at import
+_BLOCKED_BANNER = """
+╔═══════════════════════════════════════════════════════════════╗
+║                    QUALITY GATE: BLOCKED                      ║
+╚═══════════════════════════════════════════════════════════════╝
+"""
+_BLOCKED_FOOTER = """
+Action Required:
+  1. Return to previous nodes and complete missing artifacts
+  2. Verify artifacts are in docs/workflow/artifacts/
+  3. Check artifact naming matches expected output
+
+The workflow cannot proceed until all dependencies are satisfied.
+═══════════════════════════════════════════════════════════════
+"""
+
 # Required sections for artifact types
 REQUIRED_SECTIONS = {
     'vision': ['## Problem Statement', '## Desired Outcomes', '## Success Criteria'],
@@ -40,61 +64,113 @@ REQUIRED_SECTIONS = {
 }
 
 
-def is_artifact(filename):
-    """Check if filename matches any artifact pattern."""
-    for pattern_name, pattern in ARTIFACT_PATTERNS.items():
-        if re.match(pattern, filename):
-            return True, pattern_name
-    return False, None
+def _prereq_cache_key(state):
+    """
+    Build the key under which a passing prerequisite check is remembered.
+
+    Completing a node changes the count and the history file's size; adding
+    or removing an artifact changes the artifacts directory mtime. Returns
+    (key, dir_mtime), or (None, None) when there is no artifacts directory.
+    """
+    try:
+        dir_mtime = os.stat(ARTIFACTS_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return None, None
+
+    try:
+        history_size = os.stat(COMPLETED_NODES_PATH).st_size
+    except FileNotFoundError:
+        history_size = 0
 
+    key = f"{completed_nodes_count(state)}\n{history_size}\n{dir_mtime}"
+    return key, dir_mtime
 
-def load_state():
-    """Load workflow state from state.json."""
-    project_root = Path.cwd()
-    state_path = project_root / 'docs' / 'workflow' / 'state.json'
 
-    if not state_path.exists():
+def _read_prereq_cache():
+    """Return the key of the last passing prerequisite check, if any."""
+    try:
+        with open(PREREQ_CACHE_PATH) as f:
+            return f.read()
+    except OSError:
         return None
 
+
+def _write_prereq_cache(cache_key):
+    """Remember a passing prerequisite check; failures only cost a rescan."""
     try:
-        with open(state_path) as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"ERROR: Failed to parse state.json: {e}", file=sys.stderr)
-        return None
+        with open(PREREQ_CACHE_PATH, 'w') as f:
+            f.write(cache_key)
+    except OSError:
+        pass
 
 
-def check_artifact_exists(artifact_name):
-    """Check if artifact file exists."""
-    project_root = Path.cwd()
-    artifacts_dir = project_root / 'docs' / 'workflow' / 'artifacts'
-    artifact_path = artifacts_dir / artifact_name
+def _has_placeholder(content):
+    """Check a bytes-like buffer for TODO markers or placeholder text."""
+    return (content.find(b'TODO') != -1
+            or content.find(b'[Fill in]') != -1
+            or content.find(b'...') != -1)
 
-    return artifact_path.exists(), artifact_path
+
+@lru_cache(maxsize=None)
+def _required_section_re(artifact_type):
+    """Compile artifact_type's required sections into one alternation, on first use."""
+    # One pass over the content rather than one substring scan per section
+    sections = REQUIRED_SECTIONS[artifact_type]
+    return re.compile(b'|'.join(re.escape(s.encode()) for s in sections))
+
+
+def find_missing_sections(content, artifact_type):
+    """Return the REQUIRED_SECTIONS for artifact_type absent from content (bytes)."""
+    sections = REQUIRED_SECTIONS.get(artifact_type)
+    if not sections:
+        return []
+
+    found = set()
+    for match in _required_section_re(artifact_type).finditer(content):
+        found.add(match.group().decode())
+        if len(found) == len(sections):
+            return []
+
+    return [s for s in sections if s not in found]
 
 
 def validate_artifact_completeness(artifact_path):
     """Validate that artifact is complete and not empty."""
+    # Only needed on this path; keep it out of the hook's startup
+    import mmap
+
     try:
         # Check file size
-        size = artifact_path.stat().st_size
+        size = os.stat(artifact_path).st_size
         if size < MIN_ARTIFACT_SIZE:
             return False, f"File too small ({size} bytes), appears empty or incomplete"
 
-        # Read content
-        with open(artifact_path) as f:
-            content = f.read()
-
-        # Check for placeholder text
-        if 'TODO' in content or '[Fill in]' in content or '...' in content:
-            return False, "Contains TODO markers or placeholders"
-
-        # Basic markdown structure check
-        if not content.strip().startswith('#'):
-            return False, "Missing markdown header structure"
+        # Map the file and scan raw bytes rather than decoding a full copy
+        with open(artifact_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            # Check for placeholder text; very large files are real content,
+            # so only their head and tail are scanned
+            if size > MAX_PLACEHOLDER_SCAN_SIZE:
+                regions = (content[:PLACEHOLDER_SCAN_WINDOW],
+                           content[-PLACEHOLDER_SCAN_WINDOW:])
+            else:
+                regions = (content,)
+            if any(_has_placeholder(region) for region in regions):
+                return False, "Contains TODO markers or placeholders"
+
+            # Locate the content with surrounding whitespace stripped
+            start, end = 0, len(content)
+            while start < end and content[start] in _WHITESPACE:
+                start += 1
+            while end > start and content[end - 1] in _WHITESPACE:
+                end -= 1
+
+            # Basic markdown structure check
+            if content[start:start + 1] != b'#':
+                return False, "Missing markdown header structure"
 
         # Check for minimum content length
-        if len(content.strip()) < 200:
+        if end - start < 200:
             return False, "Content too brief, appears incomplete"
 
         return True, "Valid"
@@ -110,12 +186,7 @@ def get_required_artifacts_for_node(state):
 
     # Get pending artifacts for current node
     current_node = state['current_workflow'].get('current_node')
-    pending = [
-        a for a in state.get('pending_artifacts', [])
-        if a.get('expected_from') == current_node
-    ]
-
-    return pending
+    return pending_for_node(state, current_node)
 
 
 def check_prerequisites_complete(state):
@@ -125,22 +196,41 @@ def check_prerequisites_complete(state):
 
     current_node = state['current_workflow'].get('current_node')
 
+    # Skip the scan if nothing changed since the last passing check
+    cache_key, dir_mtime = _prereq_cache_key(state)
+    if cache_key and _read_prereq_cache() == cache_key:
+        return True, []
+
     # Get completed nodes
-    completed_nodes = state.get('completed_nodes', [])
+    completed_nodes = load_completed_nodes(state)
+    lost = completed_nodes_count(state) - len(completed_nodes)
+
+    # One directory scan instead of a stat() per artifact
+    existing = list_artifacts()
 
     # Check if any artifacts from previous nodes are still pending
     missing = []
     for completed in completed_nodes:
         artifacts_produced = completed.get('artifacts_produced', [])
         for artifact_name in artifacts_produced:
-            exists, artifact_path = check_artifact_exists(artifact_name)
-            if not exists:
+            if artifact_name not in existing:
                 missing.append({
                     'artifact_name': artifact_name,
                     'node': completed.get('node_name'),
                     'agent': completed.get('agent')
                 })
 
+    # Fail closed: history that can't be read can't be checked
+    if lost > 0:
+        missing.append({
+            'artifact_name': f"{lost} completed-node record(s) in {os.path.basename(COMPLETED_NODES_PATH)}",
+            'node': 'workflow history',
+            'agent': 'hooks'
+        })
+
+    if not missing and cache_key and mtime_settled(dir_mtime):
+        _write_prereq_cache(cache_key)
+
     return len(missing) == 0, missing
 
 
@@ -162,7 +252,7 @@ def is_state_transition_tool_use(event_data):
             return True
 
         # Check if writing an artifact (critical output)
-        filename = Path(file_path).name
+        filename = os.path.basename(file_path)
         is_art, _ = is_artifact(filename)
         if is_art:
             return True
@@ -192,50 +282,36 @@ def validate_workflow_state(state, event_data):
     # Check 1: Verify prerequisites from previous nodes exist
     prereqs_complete, missing_prereqs = check_prerequisites_complete(state)
     if not prereqs_complete:
-        error_msg = f"""
-╔═══════════════════════════════════════════════════════════════╗
-║                    QUALITY GATE: BLOCKED                      ║
-╚═══════════════════════════════════════════════════════════════╝
-
+        parts = [_BLOCKED_BANNER, f"""
 Current Node: {current_node}
 Current Agent: {current_agent}
 
 ERROR: Missing required artifacts from previous nodes
 
 Missing Prerequisites:
-"""
+"""]
         for missing in missing_prereqs:
-            error_msg += f"  • {missing['artifact_name']} (from {missing['node']} - {missing['agent']})\n"
-
-        error_msg += """
-Action Required:
-  1. Return to previous nodes and complete missing artifacts
-  2. Verify artifacts are in docs/workflow/artifacts/
-  3. Check artifact naming matches expected output
+            parts.append(f"  • {missing['artifact_name']} (from {missing['node']} - {missing['agent']})\n")
 
-The workflow cannot proceed until all dependencies are satisfied.
-═══════════════════════════════════════════════════════════════
-"""
-        return False, error_msg
+        parts.append(_BLOCKED_FOOTER)
+        return False, ''.join(parts)
 
     # Check 2: If writing artifact, validate it's expected from current node
     tool_name = event_data.get('tool_name')
     if tool_name == 'Write':
         file_path = event_data.get('parameters', {}).get('file_path', '')
-        filename = Path(file_path).name
+        filename = os.path.basename(file_path)
         is_art, artifact_type = is_artifact(filename)
 
         if is_art:
             # Check if this artifact is expected from current node
-            expected_artifacts = [
-                a['artifact_name'] for a in state.get('pending_artifacts', [])
-                if a.get('expected_from') == current_node
-            ]
+            expected = pending_for_node(state, current_node)
 
-            if expected_artifacts and filename not in expected_artifacts:
+            if expected and not any(a['artifact_name'] == filename for a in expected):
                 # Creating unexpected artifact - warn but allow
+                expected_names = ', '.join(a['artifact_name'] for a in expected)
                 print(f"[quality-gate] WARNING: Creating artifact '{filename}' not in expected outputs for {current_node}", file=sys.stderr)
-                print(f"[quality-gate] Expected: {', '.join(expected_artifacts)}", file=sys.stderr)
+                print(f"[quality-gate] Expected: {expected_names}", file=sys.stderr)
 
     return True, None
 
@@ -244,7 +320,7 @@ def main():
     """Main hook execution."""
     try:
         # Read event data from stdin
-        event_data = json.load(sys.stdin)
+        event_data = read_event()
 
         tool_name = event_data.get('tool_name')
 
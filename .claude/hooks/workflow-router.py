@@ -12,14 +12,27 @@ This hook fires when an agent session ends. It:
 5. Provides handoff instructions for next agent
 """
 
+import io
 import json
+import marshal
+import os
 import sys
-import csv
-from pathlib import Path
-from datetime import datetime
+from functools import lru_cache
 
+from _hooklib import (
+    PROJECT_ROOT, append_completed_node, append_wal, load_state, mtime_settled,
+    now_iso, pending_for_node, read_event, write_atomic,
+)
 
-# Map workflow graph names to CSV files
+
+# Workflow graph CSVs, resolved once per process
+CSV_DIR = os.path.join(PROJECT_ROOT, 'docs', 'plan', 'E01-SDLC-Workflow', 'csv')
+
+# Diagnostics are collected here and written to stderr once, when main()
+# finishes, rather than one write per message
+_log_buf = io.StringIO()
+
+# Map workflow graph names to CSV files in CSV_DIR
 GRAPH_CSV_MAP = {
     'PDLC': '01-pdlc.csv',
     'Feature-Refinement': '02-feature-refinement.csv',
@@ -31,132 +44,204 @@ GRAPH_CSV_MAP = {
     'Software-Development-Lifecycle': '08-release.csv'
 }
 
+# Workflow CSV columns the router uses. Each node is loaded as a tuple of
+# these fields in this order, indexed by the constants below; columns
+# missing from a CSV read as ''
+WORKFLOW_COLUMNS = ('node_name', 'agent_type', 'description', 'inputs', 'outputs', 'next_nodes')
+NODE_NAME, AGENT_TYPE, DESCRIPTION, INPUTS, OUTPUTS, NEXT_NODES = range(len(WORKFLOW_COLUMNS))
+
+# Followed by the pipe-separated columns split at load into tuples of
+# stripped, non-empty names
+INPUT_NAMES, OUTPUT_NAMES, NEXT_NODE_NAMES = range(len(WORKFLOW_COLUMNS), len(WORKFLOW_COLUMNS) + 3)
+
+# and by the kind of node routed to next (the first of NEXT_NODE_NAMES),
+# classified at load: None if next_nodes is empty
+NEXT_KIND = NEXT_NODE_NAMES + 1
+KIND_TERMINAL, KIND_SUBGRAPH, KIND_NORMAL = 'terminal', 'subgraph', 'normal'
+
+# Next-node name suffixes that launch a subgraph rather than a node
+SUBGRAPH_SUFFIXES = ('-Subgraph', '-Workflow', '-Setup')
+
+# Parsed workflow CSVs are cached here, one marshal file per CSV version.
+# marshal is built in, so a cache hit costs no extra imports. Bump
+# CSV_CACHE_FORMAT when the shape of the parsed nodes changes
+CSV_CACHE_DIR = os.path.join(PROJECT_ROOT, 'docs', 'workflow', '.csv-cache')
+CSV_CACHE_FORMAT = 4
+
+# State keys a transition can replace; those present are logged to the WAL
+TRANSITION_KEYS = ('completed_nodes_log', 'current_workflow', 'workflow_context', 'pending_artifacts')
+
+
+def log(msg):
+    """Queue a diagnostic line for stderr."""
+    _log_buf.write(msg)
+    _log_buf.write('\n')
 
-def load_state():
-    """Load workflow state from state.json."""
-    project_root = Path.cwd()
-    state_path = project_root / 'docs' / 'workflow' / 'state.json'
 
-    if not state_path.exists():
+def _split_names(value):
+    """Split a pipe-separated CSV field into a tuple of stripped, non-empty names."""
+    return tuple(name for name in (part.strip() for part in value.split('|')) if name)
+
+
+def _next_kind(next_names):
+    """Classify the node routed to after a node with next_names."""
+    if not next_names:
         return None
+    if next_names[0] == '__end__':
+        return KIND_TERMINAL
+    if next_names[0].endswith(SUBGRAPH_SUFFIXES):
+        return KIND_SUBGRAPH
+    return KIND_NORMAL
+
 
+def _read_csv_cache(cache_path):
+    """Return nodes from a CSV cache file, or None if missing or unreadable."""
     try:
-        with open(state_path) as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"ERROR: Failed to parse state.json: {e}", file=sys.stderr)
+        with open(cache_path, 'rb') as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
         return None
 
 
-def save_state(state):
-    """Save updated workflow state to state.json."""
-    project_root = Path.cwd()
-    state_path = project_root / 'docs' / 'workflow' / 'state.json'
-
+def _write_csv_cache(csv_stem, cache_path, nodes):
+    """Cache parsed nodes, replacing caches for older versions of the CSV."""
     try:
-        with open(state_path, 'w') as f:
-            json.dump(state, f, indent=2)
-        return True
-    except Exception as e:
-        print(f"ERROR: Failed to save state.json: {e}", file=sys.stderr)
-        return False
+        os.makedirs(CSV_CACHE_DIR, exist_ok=True)
+        prefix = csv_stem + '.'
+        for name in os.listdir(CSV_CACHE_DIR):
+            if name.startswith(prefix) and name.endswith('.marshal'):
+                os.remove(os.path.join(CSV_CACHE_DIR, name))
 
+        write_atomic(cache_path, marshal.dumps(nodes), fsync=False)
+    except OSError:
+        pass
 
+
+@lru_cache(maxsize=16)
 def load_workflow_csv(graph_name):
-    """Load workflow CSV definition for given graph."""
-    project_root = Path.cwd()
+    """
+    Load workflow CSV definition for given graph.
+
+    Parsed nodes are cached on disk keyed on the CSV's mtime and size, so
+    later hook runs skip parsing until the CSV changes.
+    """
     csv_filename = GRAPH_CSV_MAP.get(graph_name)
 
     if not csv_filename:
-        print(f"ERROR: Unknown workflow graph: {graph_name}", file=sys.stderr)
+        log(f"ERROR: Unknown workflow graph: {graph_name}")
         return None
 
-    csv_path = project_root / 'docs' / 'plan' / 'E01-SDLC-Workflow' / 'csv' / csv_filename
+    csv_path = os.path.join(CSV_DIR, csv_filename)
 
-    if not csv_path.exists():
-        print(f"ERROR: Workflow CSV not found: {csv_path}", file=sys.stderr)
+    try:
+        st = os.stat(csv_path)
+    except FileNotFoundError:
+        log(f"ERROR: Workflow CSV not found: {csv_path}")
         return None
 
+    csv_stem = os.path.splitext(csv_filename)[0]
+    cache_path = os.path.join(CSV_CACHE_DIR, (
+        f'{csv_stem}.{st.st_mtime_ns}.{st.st_size}.'
+        f'{sys.implementation.cache_tag}.v{CSV_CACHE_FORMAT}.marshal'
+    ))
+    nodes = _read_csv_cache(cache_path)
+    if nodes is not None:
+        return nodes
+
+    # Only needed on a cache miss; inactive workflows and cache hits never
+    # import it
+    import csv
+
     try:
-        with open(csv_path) as f:
-            reader = csv.DictReader(f)
-            nodes = {row['node_name']: row for row in reader}
+        with open(csv_path, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            positions = {name: i for i, name in enumerate(header)}
+            picks = [positions.get(name, -1) for name in WORKFLOW_COLUMNS]
+
+            nodes = {}
+            for row in reader:
+                if not row:
+                    continue
+                width = len(row)
+                node = tuple(row[i] if 0 <= i < width else '' for i in picks)
+                next_names = _split_names(node[NEXT_NODES])
+                node += (_split_names(node[INPUTS]), _split_names(node[OUTPUTS]),
+                         next_names, _next_kind(next_names))
+                nodes[node[NODE_NAME]] = node
+
+        if mtime_settled(st.st_mtime_ns):
+            _write_csv_cache(csv_stem, cache_path, nodes)
         return nodes
     except Exception as e:
-        print(f"ERROR: Failed to read workflow CSV: {e}", file=sys.stderr)
+        log(f"ERROR: Failed to read workflow CSV: {e}")
         return None
 
 
-def check_node_complete(state):
-    """Check if current node has all required artifacts created."""
-    current_node = state.get('current_workflow', {}).get('current_node')
-    if not current_node:
-        return False
-
-    # Check if any pending artifacts for this node remain
-    pending = [
-        a for a in state.get('pending_artifacts', [])
-        if a.get('expected_from') == current_node and a.get('status') != 'created'
-    ]
-
-    return len(pending) == 0
+def partition_artifacts(state, node):
+    """Split the artifacts expected from node into (created, pending) lists."""
+    created, pending = [], []
+    for artifact in pending_for_node(state, node):
+        if artifact.get('status') == 'created':
+            created.append(artifact)
+        else:
+            pending.append(artifact)
+    return created, pending
 
 
-def record_node_completion(state):
-    """Record current node as completed in history."""
+def record_node_completion(state, created, now):
+    """Record current node as completed at now, with its created artifacts."""
     current_node = state['current_workflow']['current_node']
     current_agent = state['current_workflow']['current_agent']
 
     # Get artifacts produced by this node
-    artifacts_produced = [
-        a['artifact_name'] for a in state.get('pending_artifacts', [])
-        if a.get('expected_from') == current_node and a.get('status') == 'created'
-    ]
+    artifacts_produced = [a['artifact_name'] for a in created]
 
     completion_record = {
         'node_name': current_node,
         'agent': current_agent,
-        'completed_at': datetime.now().isoformat(),
+        'completed_at': now,
         'artifacts_produced': artifacts_produced
     }
 
-    state['completed_nodes'].append(completion_record)
-    print(f"[workflow-router] Recorded completion of node: {current_node}", file=sys.stderr)
+    if not append_completed_node(state, completion_record, log):
+        return False
+
+    log(f"[workflow-router] Recorded completion of node: {current_node}")
+    return True
 
 
 def determine_next_node(state, workflow_nodes):
-    """Determine the next node based on current position and CSV definition."""
+    """
+    Determine the next node based on current position and CSV definition.
+
+    Returns (next_node_name, next_kind), or (None, None) if there is none.
+    """
     current_node = state['current_workflow']['current_node']
 
     if current_node not in workflow_nodes:
-        print(f"ERROR: Current node '{current_node}' not found in workflow CSV", file=sys.stderr)
-        return None
+        log(f"ERROR: Current node '{current_node}' not found in workflow CSV")
+        return None, None
 
     current_node_def = workflow_nodes[current_node]
-    next_nodes_value = current_node_def.get('next_nodes', '').strip()
+    next_nodes = current_node_def[NEXT_NODE_NAMES]
 
-    if not next_nodes_value:
-        print(f"ERROR: No next_nodes defined for {current_node}", file=sys.stderr)
-        return None
-
-    # Handle terminal node
-    if next_nodes_value == '__end__':
-        return '__end__'
+    if not next_nodes:
+        log(f"ERROR: No next_nodes defined for {current_node}")
+        return None, None
 
     # Handle parallel nodes (pipe-separated)
-    if '|' in next_nodes_value:
-        next_nodes = [n.strip() for n in next_nodes_value.split('|')]
-        print(f"[workflow-router] Parallel next nodes detected: {next_nodes}", file=sys.stderr)
+    if len(next_nodes) > 1:
+        log(f"[workflow-router] Parallel next nodes detected: {list(next_nodes)}")
         # For now, just return the first one
         # TODO: Implement parallel execution
-        return next_nodes[0]
 
-    return next_nodes_value
+    return next_nodes[0], current_node_def[NEXT_KIND]
 
 
-def prepare_next_node_state(state, next_node_name, workflow_nodes):
-    """Update state for next node."""
-    if next_node_name == '__end__':
+def prepare_next_node_state(state, next_node_name, next_kind, workflow_nodes, now):
+    """Update state for next node, timestamping changes with now."""
+    if next_kind == KIND_TERMINAL:
         # Workflow complete
         state['current_workflow']['status'] = 'completed'
         state['current_workflow']['current_node'] = '__end__'
@@ -164,17 +249,17 @@ def prepare_next_node_state(state, next_node_name, workflow_nodes):
 
         # Check if we're in a subgraph
         if state.get('subgraph_stack'):
-            print(f"[workflow-router] Subgraph complete, should return to parent", file=sys.stderr)
+            log(f"[workflow-router] Subgraph complete, should return to parent")
             # TODO: Handle subgraph return
         else:
-            state['workflow_context']['completed_at'] = datetime.now().isoformat()
-            print(f"[workflow-router] Workflow completed!", file=sys.stderr)
+            state['workflow_context']['completed_at'] = now
+            log(f"[workflow-router] Workflow completed!")
 
         return
 
     # Check if next is a subgraph
-    if next_node_name.endswith('-Subgraph') or next_node_name.endswith('-Workflow') or next_node_name.endswith('-Setup'):
-        print(f"[workflow-router] Next step is subgraph: {next_node_name}", file=sys.stderr)
+    if next_kind == KIND_SUBGRAPH:
+        log(f"[workflow-router] Next step is subgraph: {next_node_name}")
         # TODO: Handle subgraph launch
         state['current_workflow']['status'] = 'waiting_subgraph'
         state['current_workflow']['pending_subgraph'] = next_node_name
@@ -183,30 +268,35 @@ def prepare_next_node_state(state, next_node_name, workflow_nodes):
     # Normal next node
     next_node_def = workflow_nodes.get(next_node_name)
     if not next_node_def:
-        print(f"ERROR: Next node '{next_node_name}' not found in workflow CSV", file=sys.stderr)
+        log(f"ERROR: Next node '{next_node_name}' not found in workflow CSV")
         return
 
-    next_agent = next_node_def.get('agent_type')
-    next_outputs = next_node_def.get('outputs', '').split('|') if next_node_def.get('outputs') else []
-    next_inputs = next_node_def.get('inputs', '').split('|') if next_node_def.get('inputs') else []
+    next_agent = next_node_def[AGENT_TYPE]
 
     # Update current workflow
     state['current_workflow']['current_node'] = next_node_name
     state['current_workflow']['current_agent'] = next_agent
-    state['current_workflow']['updated_at'] = datetime.now().isoformat()
+    state['current_workflow']['updated_at'] = now
 
-    # Update pending artifacts for next node
+    # Update pending artifacts for next node; OUTPUT_NAMES is already split
+    # and stripped, and an empty tuple when the node has no outputs
+    required_by = next_node_def[NEXT_NODES] or 'unknown'
     state['pending_artifacts'] = [
         {
-            'artifact_name': output.strip(),
-            'required_by': next_node_def.get('next_nodes', 'unknown'),
+            'artifact_name': output,
+            'required_by': required_by,
             'expected_from': next_node_name,
             'status': 'pending'
         }
-        for output in next_outputs if output.strip()
+        for output in next_node_def[OUTPUT_NAMES]
     ]
 
-    print(f"[workflow-router] Transitioned to node: {next_node_name} (agent: {next_agent})", file=sys.stderr)
+    # Every new pending artifact is expected from next_node_name, so the
+    # by-node index is rebuilt directly; the by-name index is dropped
+    state['_by_node'] = {next_node_name: state['pending_artifacts']}
+    state.pop('_by_name', None)
+
+    log(f"[workflow-router] Transitioned to node: {next_node_name} (agent: {next_agent})")
 
 
 def generate_handoff_message(state, next_node_name, workflow_nodes):
@@ -222,10 +312,8 @@ def generate_handoff_message(state, next_node_name, workflow_nodes):
     if not next_node_def:
         return "\n=== ERROR ===\nNext node definition not found.\n"
 
-    next_agent = next_node_def.get('agent_type')
-    description = next_node_def.get('description')
-    outputs = next_node_def.get('outputs', '').split('|')
-    inputs = next_node_def.get('inputs', '').split('|')
+    next_agent = next_node_def[AGENT_TYPE]
+    description = next_node_def[DESCRIPTION]
 
     message = f"""
 === WORKFLOW HANDOFF ===
@@ -236,10 +324,10 @@ Current Node: {next_node_name}
 Task: {description}
 
 Required Outputs:
-{chr(10).join(f"  - {o.strip()}" for o in outputs if o.strip())}
+{chr(10).join(f"  - {o}" for o in next_node_def[OUTPUT_NAMES])}
 
 Available Inputs:
-{chr(10).join(f"  - {i.strip()}" for i in inputs if i.strip())}
+{chr(10).join(f"  - {i}" for i in next_node_def[INPUT_NAMES])}
 
 To proceed: Launch the {next_agent} agent with context about node {next_node_name}.
 The agent should create the required outputs, which will trigger the next workflow step.
@@ -253,33 +341,38 @@ def main():
     """Main hook execution."""
     try:
         # Read event data from stdin
-        event_data = json.load(sys.stdin)
+        event_data = read_event()
 
-        print(f"[workflow-router] Agent session ending, checking workflow state", file=sys.stderr)
+        log(f"[workflow-router] Agent session ending, checking workflow state")
 
         # Load workflow state
-        state = load_state()
+        state = load_state(log)
         if not state:
-            print("[workflow-router] No workflow state found, exiting", file=sys.stderr)
+            log("[workflow-router] No workflow state found, exiting")
             return
 
         # Check if workflow is active
         workflow_status = state.get('current_workflow', {}).get('status')
         if workflow_status not in ['active', 'waiting', 'waiting_approval']:
-            print(f"[workflow-router] Workflow status is '{workflow_status}', no routing needed", file=sys.stderr)
+            log(f"[workflow-router] Workflow status is '{workflow_status}', no routing needed")
             return
 
-        # Check if current node is complete
-        if not check_node_complete(state):
-            print(f"[workflow-router] Current node incomplete, not routing", file=sys.stderr)
-            print(f"[workflow-router] Pending artifacts:", file=sys.stderr)
-            for art in state.get('pending_artifacts', []):
-                if art.get('status') != 'created':
-                    print(f"  - {art['artifact_name']} ({art['status']})", file=sys.stderr)
+        # Check if current node is complete, in the same pass that collects
+        # the artifacts it produced
+        current_node = state['current_workflow'].get('current_node')
+        created, pending = partition_artifacts(state, current_node)
+        if not current_node or pending:
+            log(f"[workflow-router] Current node incomplete, not routing")
+            log(f"[workflow-router] Pending artifacts:")
+            for art in pending:
+                log(f"  - {art['artifact_name']} ({art['status']})")
             return
 
         # Record completion
-        record_node_completion(state)
+        # One timestamp for every field this transition touches
+        now = now_iso()
+        if not record_node_completion(state, created, now):
+            return
 
         # Load workflow CSV
         graph_name = state['current_workflow']['graph_name']
@@ -288,30 +381,33 @@ def main():
             return
 
         # Determine next node
-        next_node_name = determine_next_node(state, workflow_nodes)
+        next_node_name, next_kind = determine_next_node(state, workflow_nodes)
         if not next_node_name:
             return
 
         # Update state for next node
-        prepare_next_node_state(state, next_node_name, workflow_nodes)
+        prepare_next_node_state(state, next_node_name, next_kind, workflow_nodes, now)
 
-        # Save state
-        if not save_state(state):
+        # Log the transition rather than rewriting all of state.json
+        changes = [('set', key, state[key]) for key in TRANSITION_KEYS if key in state]
+        if not append_wal(state, changes, log):
             return
 
         # Generate handoff message
         handoff_msg = generate_handoff_message(state, next_node_name, workflow_nodes)
-        print(handoff_msg, file=sys.stderr)
+        log(handoff_msg)
 
         # Output to Claude
         print("\n" + handoff_msg)
 
     except json.JSONDecodeError as e:
-        print(f"[workflow-router] ERROR: Failed to parse event data: {e}", file=sys.stderr)
+        log(f"[workflow-router] ERROR: Failed to parse event data: {e}")
     except Exception as e:
-        print(f"[workflow-router] ERROR: Unexpected error: {e}", file=sys.stderr)
+        log(f"[workflow-router] ERROR: Unexpected error: {e}")
         import traceback
-        traceback.print_exc(file=sys.stderr)
+        traceback.print_exc(file=_log_buf)
+    finally:
+        sys.stderr.write(_log_buf.getvalue())
 
 
 if __name__ == '__main__':
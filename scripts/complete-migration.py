@@ -5,66 +5,71 @@ Complete the migration to cli.GetDB() pattern by replacing remaining db.InitDB p
 
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Pattern 1: Standard GetDBPath + InitDB + NewDB pattern
+# Before:
+#   dbPath, err := cli.GetDBPath()
+#   if err != nil {
+#       return fmt.Errorf("failed to get database path: %w", err)
+#   }
+#
+#   database, err := db.InitDB(dbPath)
+#   if err != nil {
+#       return fmt.Errorf("failed to initialize database: %w", err)
+#   }
+#
+# After:
+#   repoDb, err := cli.GetDB(cmd.Context())
+#   if err != nil {
+#       return fmt.Errorf("failed to get database: %w", err)
+#   }
+_PAT_INIT_DB = re.compile(
+    rb'\tdbPath, err := cli\.GetDBPath\(\)\s*\n'
+    rb'\tif err != nil \{\s*\n'
+    rb'\t\treturn fmt\.Errorf\("failed to get database path: %w", err\)\s*\n'
+    rb'\t\}\s*\n'
+    rb'\s*\n'
+    rb'\tdatabase, err := db\.InitDB\(dbPath\)\s*\n'
+    rb'\tif err != nil \{\s*\n'
+    rb'\t\treturn fmt\.Errorf\("failed to initialize database: %w", err\)\s*\n'
+    rb'\t\}',
+    re.MULTILINE
+)
+
+_INIT_DB_REPLACEMENT = (
+    b'\trepoDb, err := cli.GetDB(cmd.Context())\n'
+    b'\tif err != nil {\n'
+    b'\t\treturn fmt.Errorf("failed to get database: %w", err)\n'
+    b'\t}'
+)
+
+# Pattern 2: Replace repository.NewDB(database) with repoDb after migration
+_PAT_NEWDB = re.compile(rb'repository\.NewDB\(database\)')
+
 def migrate_file(filepath):
     """Migrate a single file to use cli.GetDB pattern."""
-    with open(filepath, 'r') as f:
-        content = f.read()
+    # Work on raw bytes: one read, no decode/encode, one write if changed
+    content = filepath.read_bytes()
 
     original = content
 
-    # Pattern 1: Standard GetDBPath + InitDB + NewDB pattern
-    # Before:
-    #   dbPath, err := cli.GetDBPath()
-    #   if err != nil {
-    #       return fmt.Errorf("failed to get database path: %w", err)
-    #   }
-    #
-    #   database, err := db.InitDB(dbPath)
-    #   if err != nil {
-    #       return fmt.Errorf("failed to initialize database: %w", err)
-    #   }
-    #
-    # After:
-    #   repoDb, err := cli.GetDB(cmd.Context())
-    #   if err != nil {
-    #       return fmt.Errorf("failed to get database: %w", err)
-    #   }
-
-    pattern1 = re.compile(
-        r'\tdbPath, err := cli\.GetDBPath\(\)\s*\n'
-        r'\tif err != nil \{\s*\n'
-        r'\t\treturn fmt\.Errorf\("failed to get database path: %w", err\)\s*\n'
-        r'\t\}\s*\n'
-        r'\s*\n'
-        r'\tdatabase, err := db\.InitDB\(dbPath\)\s*\n'
-        r'\tif err != nil \{\s*\n'
-        r'\t\treturn fmt\.Errorf\("failed to initialize database: %w", err\)\s*\n'
-        r'\t\}',
-        re.MULTILINE
-    )
-
-    replacement1 = (
-        '\trepoDb, err := cli.GetDB(cmd.Context())\n'
-        '\tif err != nil {\n'
-        '\t\treturn fmt.Errorf("failed to get database: %w", err)\n'
-        '\t}'
-    )
-
-    content = pattern1.sub(replacement1, content)
-
-    # Pattern 2: Replace repository.NewDB(database) with repoDb after migration
-    if 'cli.GetDB(cmd.Context())' in content:
-        content = re.sub(
-            r'repository\.NewDB\(database\)',
-            'repoDb',
-            content
-        )
+    # Substring checks are far cheaper than running the regexes over files
+    # that can't match
+    if b'cli.GetDBPath()' in content:
+        # Bytes I/O keeps line endings as they are, so match the file's
+        # own in the inserted block rather than splicing LF into CRLF
+        replacement = _INIT_DB_REPLACEMENT
+        if b'\r\n' in content:
+            replacement = replacement.replace(b'\n', b'\r\n')
+        content = _PAT_INIT_DB.sub(replacement, content)
+
+    if b'cli.GetDB(cmd.Context())' in content and b'repository.NewDB(database)' in content:
+        content = _PAT_NEWDB.sub(b'repoDb', content)
 
     if content != original:
-        with open(filepath, 'w') as f:
-            f.write(content)
+        filepath.write_bytes(content)
         return True
     return False
 
@@ -72,18 +77,26 @@ def main():
     commands_dir = Path('internal/cli/commands')
     migrated = 0
 
+    files = []
     for filepath in commands_dir.glob('*.go'):
         # Skip test files
         if filepath.name.endswith('_test.go'):
             continue
 
         # Skip if already using cli.GetDB
-        with open(filepath) as f:
-            content = f.read()
-            if 'cli.GetDB(' in content and 'db.InitDB' not in content:
-                continue
+        content = filepath.read_bytes()
+        if b'cli.GetDB(' in content and b'db.InitDB' not in content:
+            continue
+
+        files.append(filepath)
+
+    # Files are independent, so migrate them in parallel; report from the
+    # parent so output isn't interleaved
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(migrate_file, files))
 
-        if migrate_file(filepath):
+    for filepath, changed in zip(files, results):
+        if changed:
             print(f"✓ Migrated: {filepath}")
             migrated += 1
 
@@ -2,48 +2,48 @@
 """Fix compilation errors after migration."""
 
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Unused internal/db import line
+_PAT_DB_IMPORT = re.compile(rb'\t"github://jwwelbor/shark-task-manager/internal/db"\r?\n')
+
+# Duplicate declaration: repoDb, err := cli.GetDB when repoDb already exists
+_PAT_REDECLARE = re.compile(rb'(\trepoDb), err := cli\.GetDB\(cmd\.Context\(\)\)')
+
+# Leftover repository.NewDB(database) after database was removed
+_PAT_NEWDB = re.compile(rb'\brepository\.NewDB\(database\)')
+
 def fix_file(filepath):
-    with open(filepath, 'r') as f:
-        content = f.read()
+    # Work on raw bytes: one read, no decode/encode, one write if changed
+    content = filepath.read_bytes()
 
     original = content
     fixed = False
 
     # Remove unused db import
-    if '"github.com/jwwelbor/shark-task-manager/internal/db"' in content:
-        if 'db.InitDB' not in content and 'db.Turso' not in content and 'db.SQLite' not in content:
-            content = re.sub(
-                r'\t"github://jwwelbor/shark-task-manager/internal/db"\n',
-                '',
-                content
-            )
+    if b'"github.com/jwwelbor/shark-task-manager/internal/db"' in content:
+        if b'db.InitDB' not in content and b'db.Turso' not in content and b'db.SQLite' not in content:
+            if b'"github://jwwelbor/shark-task-manager/internal/db"' in content:
+                content = _PAT_DB_IMPORT.sub(b'', content)
             fixed = True
 
     # Fix duplicate declarations: repoDb, err := cli.GetDB when repoDb already exists
     # Change to: repoDb, err = cli.GetDB
-    content = re.sub(
-        r'(\trepoDb), err := cli\.GetDB\(cmd\.Context\(\)\)',
-        r'\1, err = cli.GetDB(cmd.Context())',
-        content
-    )
-    if content != original:
-        fixed = True
-        original = content
+    if b'repoDb, err := cli.GetDB(' in content:
+        content = _PAT_REDECLARE.sub(rb'\1, err = cli.GetDB(cmd.Context())', content)
+        if content != original:
+            fixed = True
+            original = content
 
     # Fix undefined database variable by replacing with repoDb
-    content = re.sub(
-        r'\brepository\.NewDB\(database\)',
-        'repoDb',
-        content
-    )
-    if content != original:
-        fixed = True
+    if b'repository.NewDB(database)' in content:
+        content = _PAT_NEWDB.sub(b'repoDb', content)
+        if content != original:
+            fixed = True
 
     if fixed:
-        with open(filepath, 'w') as f:
-            f.write(content)
+        filepath.write_bytes(content)
         return True
     return False
 
@@ -51,8 +51,14 @@ def main():
     commands_dir = Path('internal/cli/commands')
     fixed = 0
 
-    for filepath in commands_dir.glob('*.go'):
-        if fix_file(filepath):
+    # Files are independent, so fix them in parallel; report from the parent
+    # so output isn't interleaved
+    files = list(commands_dir.glob('*.go'))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(fix_file, files))
+
+    for filepath, changed in zip(files, results):
+        if changed:
             print(f"✓ Fixed: {filepath}")
             fixed += 1
 
@@ -5,46 +5,49 @@ Script to add execution_order field to all SQL queries in task_repository.go
 
 import re
 
-def update_file(filepath):
-    with open(filepath, 'r') as f:
-        content = f.read()
-
+# All edits are alternatives of one pattern, so the file is scanned once.
+# The outer named group of each alternative tells _replace which edit applies.
+_PAT = re.compile(
     # Pattern 1: Add execution_order to SELECT statements
     # Replace "blocked_reason," with "blocked_reason, execution_order,"
     # But only if execution_order is not already there
-    content = re.sub(
-        r'blocked_reason,(\s+)(created_at|t\.created_at)',
-        r'blocked_reason, execution_order,\1\2',
-        content
-    )
-
+    r'(?P<select>blocked_reason,(?P<select_ws>\s+)(?P<created>created_at|t\.created_at))'
     # Pattern 2: Add &task.ExecutionOrder to Scan statements
     # Replace "&task.BlockedReason," with "&task.BlockedReason,\n\t\t&task.ExecutionOrder,"
-    content = re.sub(
-        r'(&task\.BlockedReason,)(\s+)(&task\.CreatedAt)',
-        r'\1\n\t\t&task.ExecutionOrder,\2\3',
-        content
-    )
-
-    # Pattern 3: Update ORDER BY clauses to include execution_order NULLS LAST
-    # For simple ORDER BY
-    content = re.sub(
-        r'ORDER BY priority ASC, created_at ASC',
-        r'ORDER BY execution_order NULLS LAST, priority ASC, created_at ASC',
-        content
-    )
-
-    # For table-prefixed ORDER BY
-    content = re.sub(
-        r'ORDER BY t\.priority ASC, t\.created_at ASC',
-        r'ORDER BY t.execution_order NULLS LAST, t.priority ASC, t.created_at ASC',
-        content
-    )
+    r'|(?P<scan>&task\.BlockedReason,(?P<scan_ws>\s+)&task\.CreatedAt)'
+    # Pattern 3: Update ORDER BY clauses to include execution_order NULLS LAST,
+    # for both simple and table-prefixed ORDER BY
+    r'|(?P<order>ORDER BY (?P<prefix>(?:t\.)?)priority ASC, (?P=prefix)created_at ASC)'
+)
+
+def _replace(match):
+    kind = match.lastgroup
+    if kind == 'select':
+        return f"blocked_reason, execution_order,{match['select_ws']}{match['created']}"
+    if kind == 'scan':
+        return f"&task.BlockedReason,\n\t\t&task.ExecutionOrder,{match['scan_ws']}&task.CreatedAt"
+    prefix = match['prefix']
+    return f"ORDER BY {prefix}execution_order NULLS LAST, {prefix}priority ASC, {prefix}created_at ASC"
+
+def update_file(filepath):
+    """Apply the execution_order edits to filepath; return True if it changed."""
+    with open(filepath, 'r') as f:
+        content = f.read()
+
+    original = content
+
+    content = _PAT.sub(_replace, content)
+
+    # Leave an already-updated file untouched
+    if content == original:
+        print(f"No changes needed in {filepath}")
+        return False
 
     with open(filepath, 'w') as f:
         f.write(content)
 
     print(f"Updated {filepath}")
+    return True
 
 if __name__ == '__main__':
     update_file('internal/repository/task_repository.go')